@@ -8,6 +8,10 @@ class Message:
     """Class representing a musical message.
     """
 
+    # Attributes of a message as set by the constructor, used for creating messages without calling it
+    _DEFAULT_ATTRIBUTES = {"message_type": None, "time": None, "note": None, "velocity": None, "control": None,
+                           "program": None, "instrument": None, "numerator": None, "denominator": None, "key": None}
+
     def __init__(self, message_type: MessageType = None, note: int = None, velocity: int = None, control: int = None,
                  numerator: int = None, denominator: int = None, key: Key = None, time: int = None,
                  program: int = None, instrument: int = None) -> None:
@@ -89,6 +93,48 @@ class Message:
 
         return representation
 
+    @staticmethod
+    def from_arrays(message_types: list[MessageType], times: list[int], notes: list[int] = None,
+                    numerators: list[int] = None, denominators: list[int] = None) -> list[Message]:
+        """Creates messages from parallel lists of their attributes.
+
+        Bypasses the keyword argument handling of the constructor, as this is used for creating large amounts of
+        messages, e.g., during detokenisation.
+
+        Args:
+            message_types: The type of each message
+            times: The point in time of each message
+            notes: The note of each message, `None` entries for messages without a note
+            numerators: The time signature numerator of each message, `None` entries for messages without one
+            denominators: The time signature denominator of each message, `None` entries for messages without one
+
+        Returns: A list containing the created messages, in order.
+
+        """
+        n = len(message_types)
+        notes = [None] * n if notes is None else notes
+        numerators = [None] * n if numerators is None else numerators
+        denominators = [None] * n if denominators is None else denominators
+
+        # Bind lookups used in the loop to locals
+        messages = []
+        messages_append = messages.append
+        message_new = Message.__new__
+        default_attributes = Message._DEFAULT_ATTRIBUTES
+
+        for message_type, time, note, numerator, denominator in zip(message_types, times, notes, numerators,
+                                                                    denominators):
+            msg = message_new(Message)
+            msg.__dict__.update(default_attributes)
+            msg.message_type = message_type
+            msg.time = time
+            msg.note = note
+            msg.numerator = numerator
+            msg.denominator = denominator
+            messages_append(msg)
+
+        return messages
+
     @staticmethod
     def from_dict(dictionary: dict) -> Message:
         msg = Message(message_type=MessageType[dictionary.get("message_type", None)], note=dictionary.get("note", None),
@@ -15,5 +15,8 @@ class MessageType(enum.Enum):
     WAIT = "wait"
 
     def __lt__(self, other):
-        values = [e for e in MessageType]
-        return values.index(self) < values.index(other)
+        return _MESSAGE_TYPE_ORDER[self] < _MESSAGE_TYPE_ORDER[other]
+
+
+# Position of each message type in order of definition, used for comparisons
+_MESSAGE_TYPE_ORDER = {message_type: i for i, message_type in enumerate(MessageType)}
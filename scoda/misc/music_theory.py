@@ -1,5 +1,7 @@
 import enum
 
+import numpy as np
+
 
 class Note(enum.Enum):
     C = 0
@@ -52,33 +54,29 @@ class CircleOfFifths:
                               Note.C, Note.G, Note.D, Note.A, Note.E, Note.B,
                               Note.F_S]
 
+    # Position of each pitch class on the circle of fifths, indexed by the value of the note
+    _positions = tuple(index - 5 for index in map(circle_of_fifths_order.index, Note))
+    # Position of each MIDI pitch on the circle of fifths, for looking up positions of arrays of pitches at once
+    pitch_positions = np.tile(_positions, 11)[:128]
+    # Values of the notes in order of the circle of fifths
+    _order_values = tuple(note.value for note in circle_of_fifths_order)
+
     @staticmethod
     def get_position(note_val: int):
-        return CircleOfFifths.circle_of_fifths_order.index(Note(note_val % 12)) - 5
+        return CircleOfFifths._positions[note_val % 12]
 
     @staticmethod
     def get_distance(from_note_val: int, to_note_val: int):
-        from_pos = CircleOfFifths.get_position(from_note_val)
-        to_pos = CircleOfFifths.get_position(to_note_val)
-
-        distance_right = (to_pos - from_pos) % 12
-        distance_left = 12 - distance_right
-
-        if distance_left == distance_right:
-            distance = distance_right
-        elif distance_right < distance_left:
-            distance = distance_right
-        else:
-            distance = -distance_left
-
-        assert -5 <= distance <= 6
+        from_pos = CircleOfFifths._positions[from_note_val % 12]
+        to_pos = CircleOfFifths._positions[to_note_val % 12]
 
-        return distance
+        # Shortest distance in either direction, in the range of -5 to 6, ties are resolved to the right
+        return (to_pos - from_pos + 5) % 12 - 5
 
     @staticmethod
     def from_distance(base_note_val: int, cof_distance: int):
-        base_pos = CircleOfFifths.circle_of_fifths_order.index(Note(base_note_val % 12))
-        return CircleOfFifths.circle_of_fifths_order[(base_pos + cof_distance) % 12].value
+        base_pos = CircleOfFifths._positions[base_note_val % 12] + 5
+        return CircleOfFifths._order_values[(base_pos + cof_distance) % 12]
 
 
 class MusicMapping:
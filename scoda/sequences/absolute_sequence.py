@@ -63,6 +63,19 @@ class AbsoluteSequence(AbstractSequence):
         """Adds the given message to the current sequence."""
         binary_insort(self.messages, msg)
 
+    def add_messages(self, msgs: list[Message]) -> None:
+        """Adds all given messages to the current sequence.
+
+        The result is the same as calling `add_message` for each message in order, but the sequence is only re-sorted
+        once, after all messages have been appended.
+
+        Args:
+            msgs: The messages to add, each containing an entry for `time`
+
+        """
+        self.messages.extend(msgs)
+        self.messages.sort(key=lambda x: x.time)
+
     def _add_message_unsorted(self, msg: Message) -> None:
         """Adds the given message to the current sequence."""
         self.messages.append(msg)
@@ -323,6 +336,7 @@ class AbsoluteSequence(AbstractSequence):
         """
         if message_types is None:
             message_types = [MessageType.NOTE_ON, MessageType.NOTE_OFF]
+        message_types = set(message_types)
 
         self.normalise_absolute()
 
@@ -342,7 +356,7 @@ class AbsoluteSequence(AbstractSequence):
                         notes[index].append(Message(message_type=MessageType.NOTE_OFF, note=msg.note, time=msg.time))
 
                     open_messages[msg.note] = i
-                    notes.insert(i, [msg])
+                    notes.append([msg])
                     i += 1
 
                 # Add closing message to fitting open message
@@ -355,7 +369,7 @@ class AbsoluteSequence(AbstractSequence):
                         notes[index].append(msg)
 
                 else:
-                    notes.insert(i, [msg])
+                    notes.append([msg])
                     i += 1
 
         # Check unclosed notes
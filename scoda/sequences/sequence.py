@@ -122,6 +122,11 @@ class Sequence:
         self.abs.add_message(msg)
         self._rel_stale = True
 
+    def add_absolute_messages(self, msgs) -> None:
+        """See `scoda.sequence.absolute_sequence.AbsoluteSequence.add_messages`."""
+        self.abs.add_messages(msgs)
+        self._rel_stale = True
+
     def add_relative_message(self, msg) -> None:
         """See `scoda.sequence.relative_sequence.RelativeSequence.add_message`."""
         self.rel.add_message(msg)
@@ -342,6 +347,22 @@ class Sequence:
 
     # Static Functions
 
+    @staticmethod
+    def from_arrays(message_types: list[MessageType], times: list[int], notes: list[int] = None,
+                    numerators: list[int] = None, denominators: list[int] = None) -> Sequence:
+        """Creates a `scoda.Sequence` from parallel lists of message attributes.
+
+        See `scoda.elements.message.Message.from_arrays` for the meaning of the arguments. The messages are added to
+        the sequence in the given order, see `scoda.sequence.absolute_sequence.AbsoluteSequence.add_messages`.
+
+        Returns: The resulting sequence.
+
+        """
+        sequence = Sequence()
+        sequence.add_absolute_messages(Message.from_arrays(message_types, times, notes, numerators, denominators))
+
+        return sequence
+
     @staticmethod
     def sequences_load(file_path: Path | str = None,
                        midi_file: MidiFile = None,
@@ -1,4 +1,7 @@
+import itertools
 import math
+from array import array
+from bisect import bisect_left, bisect_right
 from abc import ABC, abstractmethod
 from typing import Tuple, List, Any
 
@@ -11,7 +14,7 @@ from scoda.enumerations.tokenisation_prefixes import TokenisationPrefixes
 from scoda.exceptions.tokenisation_exception import TokenisationException
 from scoda.misc.music_theory import CircleOfFifths
 from scoda.misc.scoda_logging import get_logger
-from scoda.misc.util import get_default_step_sizes, get_default_note_values, get_velocity_bins, bin_velocity
+from scoda.misc.util import get_default_step_sizes, get_default_note_values, get_velocity_bins
 from scoda.sequences.sequence import Sequence
 from scoda.settings.settings import PPQN, DEFAULT_TIME_SIGNATURE_NUMERATOR, DEFAULT_TIME_SIGNATURE_DENOMINATOR
 
@@ -19,6 +22,12 @@ LOGGER = get_logger(__name__)
 
 
 class MultiTrackLargeVocabularyNotelikeTokeniser:
+    # Kinds of tokens, as stored per token id in `_token_kinds`
+    _TOKEN_KIND_OTHER = 0
+    _TOKEN_KIND_BAR = 1
+    _TOKEN_KIND_REST = 2
+    _TOKEN_KIND_NOTE = 3
+    _TOKEN_KIND_TIME_SIGNATURE = 4
 
     def __init__(self,
                  ppqn: int = None,
@@ -29,8 +38,25 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
                  velocity_bins: int = 1,
                  time_signature_range: Tuple[int, int] = (2, 16)):
         self.dictionary = dict()
-        self.inverse_dictionary = dict()
+        # Tokens indexed by their id
+        self.inverse_dictionary = list()
+        # Tokens indexed by their id, for decoding arrays of ids
+        self._inverse_array = None
         self.dictionary_size = 0
+        # Note tokens by instrument, pitch, value and velocity bin, reused instead of formatting them for every note
+        self._note_tokens = dict()
+        # Rest tokens by step size
+        self._rest_tokens = dict()
+        # Time signature tokens by numerator, in multiples of eighths
+        self._time_signature_tokens = dict()
+        # Information about each token, indexed by token id
+        self._token_kinds = None
+        self._token_rests = None
+        self._token_instruments = None
+        self._token_pitches = None
+        self._token_values = None
+        self._token_velocities = None
+        self._token_bar_capacities = None
 
         self.ppqn = ppqn
         self.step_sizes = step_sizes
@@ -48,6 +74,8 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
         if self.note_values is None:
             self.note_values = get_default_note_values()
         self.note_values.sort()
+        # Supported note values for membership tests
+        self._note_values_set = frozenset(self.note_values)
 
         self.velocity_bins = get_velocity_bins(velocity_bins=velocity_bins)
 
@@ -58,6 +86,9 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
         # Construct dictionary
         self._construct_dictionary()
 
+        # Decomposition of every rest shorter than the largest step size, see `_flush_buffer`
+        self._rest_decompositions = self._construct_rest_decompositions()
+
         self.reset()
 
     def reset(self) -> None:
@@ -78,9 +109,16 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
         event_pairings = sequence_bar.abs.get_message_time_pairings(
             [MessageType.NOTE_ON, MessageType.NOTE_OFF, MessageType.TIME_SIGNATURE, MessageType.INTERNAL])
 
+        # Attributes read for every note
+        pitch_lower, pitch_upper = self.pitch_range
+        note_values = self._note_values_set
+        velocity_bins = self.velocity_bins
+        note_tokens = self._note_tokens
+
         for event_pairing in event_pairings:
-            msg_type = event_pairing[0].message_type
-            msg_time = event_pairing[0].time
+            msg = event_pairing[0]
+            msg_type = msg.message_type
+            msg_time = msg.time
 
             # Check if message occurs at current time, if not place rest messages
             if not self.cur_time == msg_time:
@@ -88,24 +126,26 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
                 self.cur_time = msg_time
                 self.cur_rest_buffer = 0
 
-            if msg_type == MessageType.NOTE_ON:
-                msg_instrument = event_pairing[0].instrument
-                msg_note = event_pairing[0].note
+            if msg_type is MessageType.NOTE_ON:
+                msg_instrument = msg.instrument
+                msg_note = msg.note
                 msg_value = event_pairing[1].time - msg_time
-                msg_velocity = self.velocity_bins[bin_velocity(event_pairing[0].velocity, self.velocity_bins)]
+                # Equivalent to `bin_velocity`, without converting the bins to an array for every note
+                msg_velocity = velocity_bins[bisect_left(velocity_bins, msg.velocity)]
 
-                if not (self.pitch_range[0] <= msg_note <= self.pitch_range[1]):
+                if not (pitch_lower <= msg_note <= pitch_upper):
                     raise TokenisationException(f"Invalid note pitch: {msg_note}")
-                if msg_value not in self.note_values:
+                if msg_value not in note_values:
                     raise TokenisationException(f"Invalid note value: {msg_value}")
 
-                tokens.append(f"{TokenisationPrefixes.INSTRUMENT.value}_{msg_instrument:02}-"
-                              f"{TokenisationPrefixes.PITCH.value}_{msg_note:03}-"
-                              f"{TokenisationPrefixes.VALUE.value}_{msg_value:02}-"
-                              f"{TokenisationPrefixes.VELOCITY.value}_{msg_velocity:03}")
-            elif msg_type == MessageType.TIME_SIGNATURE:
-                msg_numerator = event_pairing[0].numerator
-                msg_denominator = event_pairing[0].denominator
+                note_token = note_tokens.get((msg_instrument, msg_note, msg_value, msg_velocity))
+                if note_token is None:
+                    raise TokenisationException(f"Invalid note instrument: {msg_instrument}")
+
+                tokens.append(note_token)
+            elif msg_type is MessageType.TIME_SIGNATURE:
+                msg_numerator = msg.numerator
+                msg_denominator = msg.denominator
 
                 scaled = msg_numerator * (DEFAULT_TIME_SIGNATURE_DENOMINATOR / msg_denominator)
                 if not float(scaled).is_integer():
@@ -115,8 +155,7 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
                 if not self.time_signature_range[0] <= scaled <= self.time_signature_range[1]:
                     raise TokenisationException(f"Invalid time signature numerator: {scaled}")
 
-                tokens.append(
-                    f"{TokenisationPrefixes.TIME_SIGNATURE.value}_{scaled:02}_{DEFAULT_TIME_SIGNATURE_NUMERATOR:02}")
+                tokens.append(self._time_signature_tokens[scaled])
 
         if insert_bar_token:
             tokens.append(TokenisationPrefixes.BAR.value)
@@ -127,186 +166,292 @@ class MultiTrackLargeVocabularyNotelikeTokeniser:
         return tokens
 
     def detokenise(self, tokens: List[str]) -> List[Sequence]:
+        return self.detokenise_ids(self._token_ids(tokens))
+
+    def detokenise_ids(self, ids: np.ndarray) -> List[Sequence]:
+        """Constructs sequences from the given encoded tokens, see `detokenise`.
+
+        Args:
+            ids: The ids of the tokens to detokenise
+
+        Returns: One sequence per instrument, containing the messages represented by the tokens
+
+        """
+        ids = self._validate_ids(ids)
+
         # Setup Values
         sequences = [Sequence() for _ in range(self.num_instruments)]
+        sequences_messages = [[] for _ in range(self.num_instruments)]
         cur_time = 0
         cur_time_bar = 0
-        cur_time_signature_numerator = DEFAULT_TIME_SIGNATURE_NUMERATOR
-        cur_time_signature_denominator = DEFAULT_TIME_SIGNATURE_DENOMINATOR
-        cur_bar_capacity_total = int(self.ppqn * 4 * cur_time_signature_numerator / cur_time_signature_denominator)
+        cur_bar_capacity_total = self._bar_capacity(DEFAULT_TIME_SIGNATURE_NUMERATOR, DEFAULT_TIME_SIGNATURE_DENOMINATOR)
         cur_bar_capacity_remaining = cur_bar_capacity_total
 
-        for token in tokens:
-            token_parts = self._split_token(token)
-            part_main = token_parts[0][0]
-
-            if part_main == TokenisationPrefixes.BAR.value:
+        for token_id, kind, rest, note_instrument, note_pitch, note_value, note_velocity, bar_capacity in zip(
+                ids.tolist(),
+                self._token_kinds[ids].tolist(),
+                self._token_rests[ids].tolist(),
+                self._token_instruments[ids].tolist(),
+                self._token_pitches[ids].tolist(),
+                self._token_values[ids].tolist(),
+                self._token_velocities[ids].tolist(),
+                self._token_bar_capacities[ids].tolist()):
+            if kind == self._TOKEN_KIND_BAR:
                 cur_time += cur_bar_capacity_remaining
                 cur_time_bar = 0
                 cur_bar_capacity_remaining = cur_bar_capacity_total
 
-                for sequence in sequences:
-                    sequence.add_absolute_message(Message(message_type=MessageType.INTERNAL, time=cur_time))
-            elif part_main == TokenisationPrefixes.REST.value:
-                cur_time += int(token_parts[0][1])
-                cur_time_bar += int(token_parts[0][1])
-                cur_bar_capacity_remaining -= int(token_parts[0][1])
-            elif part_main == TokenisationPrefixes.INSTRUMENT.value:
-                note_instrument = int(token_parts[0][1])
-                note_pitch = int(token_parts[1][1])
-                note_value = int(token_parts[2][1])
-                note_velocity = int(token_parts[3][1])
-
-                sequences[note_instrument].add_absolute_message(
+                for sequence_messages in sequences_messages:
+                    sequence_messages.append(Message(message_type=MessageType.INTERNAL, time=cur_time))
+            elif kind == self._TOKEN_KIND_REST:
+                cur_time += rest
+                cur_time_bar += rest
+                cur_bar_capacity_remaining -= rest
+            elif kind == self._TOKEN_KIND_NOTE:
+                sequences_messages[note_instrument].append(
                     Message(message_type=MessageType.NOTE_ON, note=note_pitch, time=cur_time, velocity=note_velocity)
                 )
-                sequences[note_instrument].add_absolute_message(
+                sequences_messages[note_instrument].append(
                     Message(message_type=MessageType.NOTE_OFF, note=note_pitch, time=cur_time + note_value)
                 )
-            elif part_main == TokenisationPrefixes.TIME_SIGNATURE.value:
+            elif kind == self._TOKEN_KIND_TIME_SIGNATURE:
                 if cur_time_bar > 0:
                     LOGGER.warning(
                         f"Skipping time signature change mid-bar at time {cur_time} (bar time {cur_time_bar})")
                 else:
-                    cur_time_signature_numerator = int(token_parts[0][1])
-                    cur_time_signature_denominator = int(token_parts[0][2])
-                    cur_bar_capacity_total = int(
-                        self.ppqn * 4 * cur_time_signature_numerator / cur_time_signature_denominator)
+                    cur_bar_capacity_total = bar_capacity
                     cur_bar_capacity_remaining = cur_bar_capacity_total
             else:
-                raise TokenisationException(f"Invalid token: {token}")
+                raise TokenisationException(f"Invalid token: {self.inverse_dictionary[token_id]}")
+
+        # Insert all messages of a sequence at once
+        for sequence, sequence_messages in zip(sequences, sequences_messages):
+            sequence.add_absolute_messages(sequence_messages)
 
         return sequences
 
     def encode(self, tokens: List[str]) -> List[int]:
-        return [self.dictionary[token] for token in tokens]
+        return list(map(self.dictionary.__getitem__, tokens))
 
     def decode(self, tokens: List[int]) -> List[str]:
-        return [self.inverse_dictionary[token] for token in tokens]
-
-    def get_info(self, tokens: List[str]) -> dict[str, list[int]]:
-        info_pos = []
-        info_time = []
-        info_time_bar = []
-        info_pitch = []
-        info_cof = []
-
-        # Setup Values
-        cur_pos = 0
-        cur_time = 0
-        cur_time_bar = 0
-        cur_time_signature_numerator = DEFAULT_TIME_SIGNATURE_NUMERATOR
-        cur_time_signature_denominator = DEFAULT_TIME_SIGNATURE_DENOMINATOR
-        cur_bar_capacity_total = int(self.ppqn * 4 * cur_time_signature_numerator / cur_time_signature_denominator)
-        cur_bar_capacity_remaining = cur_bar_capacity_total
+        if isinstance(tokens, np.ndarray):
+            return self._inverse_array[self._validate_ids(tokens)].tolist()
 
-        for token in tokens:
-            token_parts = self._split_token(token)
-            part_main = token_parts[0][0]
+        # Ids are used as indices, negative ones would silently wrap around
+        if len(tokens) > 0 and (min(tokens) < 0 or max(tokens) >= self.dictionary_size):
+            raise TokenisationException(f"Invalid token id: "
+                                        f"{next(t for t in tokens if not 0 <= t < self.dictionary_size)}")
 
-            info_time.append(cur_time)
-            info_time_bar.append(cur_time_bar)
+        return list(map(self.inverse_dictionary.__getitem__, tokens))
 
-            if part_main == TokenisationPrefixes.BAR.value:
-                cur_time += cur_bar_capacity_remaining
-                cur_time_bar = 0
-                cur_bar_capacity_remaining = cur_bar_capacity_total
-
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-            elif part_main == TokenisationPrefixes.REST.value:
-                cur_time += int(token_parts[0][1])
-                cur_time_bar += int(token_parts[0][1])
-                cur_bar_capacity_remaining -= int(token_parts[0][1])
-
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-            elif part_main == TokenisationPrefixes.INSTRUMENT.value:
-                note_pitch = int(token_parts[1][1])
-
-                info_pitch.append(note_pitch)
-                info_cof.append(CircleOfFifths.get_position(note_pitch))
-            elif part_main == TokenisationPrefixes.TIME_SIGNATURE.value:
-                if cur_time_bar > 0:
-                    LOGGER.warning(
-                        f"Skipping time signature change mid-bar at time {cur_time} (bar time {cur_time_bar})")
-                else:
-                    cur_time_signature_numerator = int(token_parts[0][1])
-                    cur_time_signature_denominator = int(token_parts[0][2])
-                    cur_bar_capacity_total = int(
-                        self.ppqn * 4 * cur_time_signature_numerator / cur_time_signature_denominator)
-                    cur_bar_capacity_remaining = cur_bar_capacity_total
-
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
+    def get_info(self, tokens: List[str]) -> dict[str, list[int]]:
+        return self.get_info_ids(self._token_ids(tokens))
+
+    def get_info_ids(self, ids: np.ndarray) -> dict[str, list[int]]:
+        """Calculates positional information for the given encoded tokens, see `get_info`.
+
+        Args:
+            ids: The ids of the tokens to calculate the information for
+
+        Returns: A dictionary containing the position, time, time in the bar, pitch and position on the circle of
+        fifths for each token.
+
+        """
+        info = self.get_info_np(ids)
+
+        # Pitches and positions are integers for notes and NaN for all other tokens
+        is_note = ~np.isnan(info["info_pitch"])
+        info_pitch = np.full(len(is_note), math.nan, dtype=object)
+        info_pitch[is_note] = info["info_pitch"][is_note].astype(np.int64).tolist()
+        info_cof = np.full(len(is_note), math.nan, dtype=object)
+        info_cof[is_note] = info["info_circle_of_fifths"][is_note].astype(np.int64).tolist()
+
+        return {"info_position": info["info_position"].tolist(),
+                "info_time": info["info_time"].tolist(),
+                "info_time_bar": info["info_time_bar"].tolist(),
+                "info_pitch": info_pitch.tolist(),
+                "info_circle_of_fifths": info_cof.tolist()}
+
+    def get_info_np(self, ids: np.ndarray) -> dict[str, np.ndarray]:
+        """Calculates positional information for the given encoded tokens as arrays, see `get_info_ids`.
+
+        Args:
+            ids: The ids of the tokens to calculate the information for
+
+        Returns: A dictionary containing arrays of the position, time, time in the bar, pitch and position on the
+        circle of fifths for each token, where pitch and position are NaN for tokens not representing notes.
+
+        """
+        ids = self._validate_ids(ids)
+
+        kinds = self._token_kinds[ids]
+        is_note = kinds == self._TOKEN_KIND_NOTE
+
+        # Information is recorded before processing the respective token
+        rests = self._token_rests[ids]
+        rest_times = (np.cumsum(rests) - rests).tolist()
+
+        # Bars and time signatures depend on the time passed in the current bar, only these are processed in order
+        time_deltas = rests.copy()
+        time_bar_deltas = rests.copy()
+        indices = np.flatnonzero((kinds == self._TOKEN_KIND_BAR) | (kinds == self._TOKEN_KIND_TIME_SIGNATURE))
+        indices_ids = ids[indices]
+
+        cur_time_bar_start = 0
+        cur_time_bars_skipped = 0
+        cur_bar_capacity_total = self._bar_capacity(DEFAULT_TIME_SIGNATURE_NUMERATOR, DEFAULT_TIME_SIGNATURE_DENOMINATOR)
+
+        for i, kind, bar_capacity in zip(indices.tolist(),
+                                         self._token_kinds[indices_ids].tolist(),
+                                         self._token_bar_capacities[indices_ids].tolist()):
+            cur_time_bar = rest_times[i] - cur_time_bar_start
+
+            if kind == self._TOKEN_KIND_BAR:
+                time_deltas[i] = cur_bar_capacity_total - cur_time_bar
+                time_bar_deltas[i] = -cur_time_bar
+                cur_time_bar_start = rest_times[i]
+                cur_time_bars_skipped += cur_bar_capacity_total - cur_time_bar
+            elif cur_time_bar > 0:
+                LOGGER.warning(f"Skipping time signature change mid-bar at time "
+                               f"{rest_times[i] + cur_time_bars_skipped} (bar time {cur_time_bar})")
             else:
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
+                cur_bar_capacity_total = bar_capacity
 
-            info_pos.append(cur_pos)
-            cur_pos += 1
+        info_time = np.cumsum(time_deltas) - time_deltas
+        info_time_bar = np.cumsum(time_bar_deltas) - time_bar_deltas
 
-        return {"info_position": info_pos,
+        note_pitches = self._token_pitches[ids[is_note]]
+        info_pitch = np.full(len(ids), math.nan)
+        info_pitch[is_note] = note_pitches
+        info_cof = np.full(len(ids), math.nan)
+        info_cof[is_note] = CircleOfFifths.pitch_positions[note_pitches]
+
+        return {"info_position": np.arange(len(ids)),
                 "info_time": info_time,
                 "info_time_bar": info_time_bar,
                 "info_pitch": info_pitch,
                 "info_circle_of_fifths": info_cof}
 
-    def _split_token(self, token: str):
-        parts = token.split("-")
-        sub_parts = [part.split("_") for part in parts]
-        return sub_parts
+    def _token_ids(self, tokens: List[str]) -> np.ndarray:
+        ids = []
+
+        for token in tokens:
+            token_id = self.dictionary.get(token)
+            if token_id is None:
+                raise TokenisationException(f"Invalid token: {token}")
+            ids.append(token_id)
+
+        return np.array(ids, dtype=np.int64)
+
+    def _validate_ids(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+
+        # Ids are used as indices, negative ones would silently wrap around
+        invalid = (ids < 0) | (ids >= self.dictionary_size)
+        if np.any(invalid):
+            raise TokenisationException(f"Invalid token id: {ids[np.argmax(invalid)]}")
+
+        return ids
+
+    def _bar_capacity(self, time_signature_numerator: int, time_signature_denominator: int) -> int:
+        return self.ppqn * 4 * time_signature_numerator // time_signature_denominator
 
     def _construct_dictionary(self):
+        # Kind, rest, note information and bar capacity set by time signatures of each token, in order of token ids
+        token_info = []
+
         self.dictionary[TokenisationPrefixes.PAD.value] = 0
         self.dictionary_size += 1
+        token_info.append((self._TOKEN_KIND_OTHER, 0, 0, 0, 0, 0, 0))
 
         self.dictionary[TokenisationPrefixes.START.value] = 1
         self.dictionary_size += 1
+        token_info.append((self._TOKEN_KIND_OTHER, 0, 0, 0, 0, 0, 0))
 
         self.dictionary[TokenisationPrefixes.STOP.value] = 2
         self.dictionary_size += 1
+        token_info.append((self._TOKEN_KIND_OTHER, 0, 0, 0, 0, 0, 0))
 
         self.dictionary[TokenisationPrefixes.BAR.value] = 3
         self.dictionary_size += 1
+        token_info.append((self._TOKEN_KIND_BAR, 0, 0, 0, 0, 0, 0))
 
         for step_size in self.step_sizes:
-            self.dictionary[f"{TokenisationPrefixes.REST.value}_{step_size:02}"] = self.dictionary_size
+            token = f"{TokenisationPrefixes.REST.value}_{step_size:02}"
+            self.dictionary[token] = self.dictionary_size
+            self._rest_tokens[step_size] = token
             self.dictionary_size += 1
-
-        for i_ins in range(self.num_instruments):
-            for pitch in range(self.pitch_range[0], self.pitch_range[1] + 1):
-                for note_value in self.note_values:
-                    for velocity_bin in self.velocity_bins:
-                        self.dictionary[(f"{TokenisationPrefixes.INSTRUMENT.value}_{i_ins:02}-"
-                                         f"{TokenisationPrefixes.PITCH.value}_{pitch:03}-"
-                                         f"{TokenisationPrefixes.VALUE.value}_{note_value:02}-"
-                                         f"{TokenisationPrefixes.VELOCITY.value}_{velocity_bin:03}")] = self.dictionary_size
-                        self.dictionary_size += 1
+            token_info.append((self._TOKEN_KIND_REST, step_size, 0, 0, 0, 0, 0))
+
+        # Each part of the note tokens is formatted once, tokens are concatenations of these parts
+        instrument_parts = [(i_ins, f"{TokenisationPrefixes.INSTRUMENT.value}_{i_ins:02}-")
+                            for i_ins in range(self.num_instruments)]
+        pitch_parts = [(pitch, f"{TokenisationPrefixes.PITCH.value}_{pitch:03}-")
+                       for pitch in range(self.pitch_range[0], self.pitch_range[1] + 1)]
+        value_parts = [(note_value, f"{TokenisationPrefixes.VALUE.value}_{note_value:02}-")
+                       for note_value in self.note_values]
+        velocity_parts = [(velocity_bin, f"{TokenisationPrefixes.VELOCITY.value}_{velocity_bin:03}")
+                          for velocity_bin in self.velocity_bins]
+
+        for (i_ins, instrument_part), (pitch, pitch_part), (note_value, value_part), (velocity_bin, velocity_part) in \
+                itertools.product(instrument_parts, pitch_parts, value_parts, velocity_parts):
+            token = instrument_part + pitch_part + value_part + velocity_part
+            self.dictionary[token] = self.dictionary_size
+            self._note_tokens[(i_ins, pitch, note_value, velocity_bin)] = token
+            self.dictionary_size += 1
+            token_info.append((self._TOKEN_KIND_NOTE, 0, i_ins, pitch, note_value, velocity_bin, 0))
 
         for time_signature in range(self.time_signature_range[0], self.time_signature_range[1] + 1):
-            self.dictionary[
-                f"{TokenisationPrefixes.TIME_SIGNATURE.value}_{time_signature:02}_{DEFAULT_TIME_SIGNATURE_DENOMINATOR:02}"] = self.dictionary_size
+            token = (f"{TokenisationPrefixes.TIME_SIGNATURE.value}_{time_signature:02}_"
+                     f"{DEFAULT_TIME_SIGNATURE_DENOMINATOR:02}")
+            self.dictionary[token] = self.dictionary_size
+            self._time_signature_tokens[time_signature] = token
             self.dictionary_size += 1
+            token_info.append(
+                (self._TOKEN_KIND_TIME_SIGNATURE, 0, 0, 0, 0, 0,
+                 self._bar_capacity(time_signature, DEFAULT_TIME_SIGNATURE_DENOMINATOR)))
 
-        self.inverse_dictionary = {v: k for k, v in self.dictionary.items()}
+        # Tokens were inserted in order of their ids
+        self.inverse_dictionary = list(self.dictionary)
+        self._inverse_array = np.array(self.inverse_dictionary, dtype=object)
 
-    def _flush_buffer(self, time: int) -> List[str]:
-        tokens = []
+        (self._token_kinds, self._token_rests, self._token_instruments, self._token_pitches, self._token_values,
+         self._token_velocities, self._token_bar_capacities) = np.array(token_info, dtype=np.int64).T
+
+    def _construct_rest_decompositions(self) -> list[tuple[tuple[str, ...], int]]:
+        rest_decompositions = []
 
-        if time >= 40:
-            pass
+        # Greedily decompose each rest into step sizes, recording the tokens and the time that cannot be represented
+        for time in range(self.step_sizes[-1]):
+            rest_tokens = []
 
-        while any(time >= rest for rest in self.step_sizes):
             for rest in reversed(self.step_sizes):
-                if time >= rest:
-                    tokens.append(f"{TokenisationPrefixes.REST.value}_{rest:02}")
+                while time >= rest:
+                    rest_tokens.append(self._rest_tokens[rest])
                     time -= rest
-                    break
 
-        if time > 0:
+            rest_decompositions.append((tuple(rest_tokens), time))
+
+        return rest_decompositions
+
+    def _flush_buffer(self, time: int) -> List[str]:
+        if time <= 0:
+            return []
+
+        # Times that are not whole ticks cannot be represented by any combination of rests
+        if not float(time).is_integer():
             raise TokenisationException(f"Invalid remaining rest value: {time}")
 
+        # Greedy decomposition uses the largest step size as often as possible, the remainder is looked up
+        num_max_rests, remainder = divmod(int(time), self.step_sizes[-1])
+        rest_tokens, remaining_time = self._rest_decompositions[remainder]
+
+        if remaining_time > 0:
+            raise TokenisationException(f"Invalid remaining rest value: {remaining_time}")
+
+        tokens = [self._rest_tokens[self.step_sizes[-1]]] * num_max_rests
+        tokens.extend(rest_tokens)
+
         return tokens
 
 
@@ -353,9 +498,7 @@ class BaseTokeniser(ABC):
         self.prv_value = -1
         self.prv_numerator = -1
 
-    def _general_tokenise_flush_time_buffer(self, time: int, index_time_def: int) -> list[int]:
-        tokens = []
-
+    def _general_tokenise_flush_time_buffer(self, tokens: array, time: int, index_time_def: int) -> None:
         while time > self.set_max_rest_value:
             tokens.append(int(self.set_max_rest_value + index_time_def - 1))
             time -= self.set_max_rest_value
@@ -363,8 +506,6 @@ class BaseTokeniser(ABC):
         if time > 0:
             tokens.append(int(time + index_time_def - 1))
 
-        return tokens
-
     def _notelike_tokenise_flush_rest_buffer(self, apply_target: bool, wait_token: int, index_time_def: int) -> list[
         int]:
         tokens = []
@@ -443,77 +584,125 @@ class BaseNotelikeTokeniser(BaseTokeniser, ABC):
 
 
 class BaseLargeVocabularyNotelikeTokeniser(BaseNotelikeTokeniser, ABC):
-    SUPPORTED_VALUES = [2, 3, 4, 6, 8, 9, 12, 16, 18, 24, 32, 36, 48, 64, 72, 96]
+    SUPPORTED_VALUES = (2, 3, 4, 6, 8, 9, 12, 16, 18, 24, 32, 36, 48, 64, 72, 96)
+    # Supported values for constant-time membership tests
+    _SUPPORTED_VALUES_SET = frozenset(SUPPORTED_VALUES)
     NOTE_SECTION_SIZE = None
+    # Offset of the time signature tokens, relative to the numerator in eights
+    _TS_TOKEN_BASE = None
 
     def __init__(self, running_time_sig: bool) -> None:
         super().__init__(False, running_time_sig)
 
-    def tokenise(self, sequence: Sequence, apply_buffer: bool = True, reset_time: bool = True) -> list[int]:
-        tokens = []
-        event_pairings = sequence.abs.get_message_time_pairings(
-            [MessageType.NOTE_ON, MessageType.NOTE_OFF, MessageType.TIME_SIGNATURE, MessageType.INTERNAL])
+        # Flags as read at the start of the current tokenisation
+        self._running_time_sig = False
 
-        for event_pairing in event_pairings:
-            msg_type = event_pairing[0].message_type
-            msg_time = event_pairing[0].time
+    def tokenise(self, sequence: Sequence, apply_buffer: bool = True, reset_time: bool = True,
+                 insert_border_tokens: bool = False) -> list[int]:
+        return self._tokenise(sequence, apply_buffer=apply_buffer, reset_time=reset_time,
+                              insert_border_tokens=insert_border_tokens).tolist()
 
-            if msg_type == MessageType.NOTE_ON:
-                msg_note = event_pairing[0].note
-                msg_value = event_pairing[1].time - msg_time
+    def tokenise_packed(self, sequence: Sequence, apply_buffer: bool = True, reset_time: bool = True,
+                        insert_border_tokens: bool = False) -> np.ndarray:
+        """Tokenises the given sequence, returning the tokens as a compact array suitable for storage.
 
-                if not (21 <= msg_note <= 108):
-                    raise TokenisationException(f"Invalid note pitch: {msg_note}")
-                if msg_value not in LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES:
-                    raise TokenisationException(f"Invalid note value: {msg_value}")
+        See `tokenise` for the meaning of the arguments.
 
-                # Check if message occurs at current time, if not place rest messages
-                if not self.cur_time == msg_time:
-                    self.cur_rest_buffer += msg_time - self.cur_time
-                    tokens.extend(
-                        self._general_tokenise_flush_time_buffer(time=self.cur_rest_buffer, index_time_def=4))
-                    self.cur_time += self.cur_rest_buffer
-                    self.cur_rest_buffer = 0
+        Returns: An array of dtype `np.uint16` containing the tokens.
 
-                # Callback
-                self._tokenise_note(tokens, msg_note, msg_value)
+        """
+        return np.frombuffer(self._tokenise(sequence, apply_buffer=apply_buffer, reset_time=reset_time,
+                                            insert_border_tokens=insert_border_tokens),
+                             dtype=np.int32).astype(np.uint16)
 
-                self.cur_time_target = max(self.cur_time_target, self.cur_time + msg_value)
-                self.prv_note = msg_note
-            elif msg_type == MessageType.TIME_SIGNATURE:
-                msg_numerator = event_pairing[0].numerator
-                msg_denominator = event_pairing[0].denominator
+    def _tokenise(self, sequence: Sequence, apply_buffer: bool, reset_time: bool,
+                  insert_border_tokens: bool) -> array:
+        # Store tokens as contiguous machine integers while collecting them
+        tokens = array("i")
 
-                numerator = self._time_signature_to_eights(msg_numerator, msg_denominator)
+        # Place start token up front instead of shifting all tokens afterwards
+        if insert_border_tokens:
+            tokens.append(self.TOKEN_START)
 
-                # Check if time signature has to be defined
-                if not (self.prv_numerator == numerator and self.flags.get(TokenisationFlags.RUNNING_TIME_SIG, False)):
-                    self.cur_rest_buffer += msg_time - self.cur_time
-                    tokens.extend(
-                        self._general_tokenise_flush_time_buffer(time=self.cur_rest_buffer, index_time_def=4))
-                    self.cur_time += self.cur_rest_buffer
-                    self.cur_rest_buffer = 0
+        event_pairings = sequence.abs.get_message_time_pairings(
+            [MessageType.NOTE_ON, MessageType.NOTE_OFF, MessageType.TIME_SIGNATURE, MessageType.INTERNAL])
 
-                    tokens.append(numerator - 2 + len(self.SUPPORTED_VALUES) * self.NOTE_SECTION_SIZE + 4 + 24)
+        self._running_time_sig = self.flags.get(TokenisationFlags.RUNNING_TIME_SIG, False)
 
-                self.prv_numerator = numerator
-            elif msg_type == MessageType.INTERNAL:
-                self.cur_rest_buffer += msg_time - self.cur_time
+        event_handlers = self._EVENT_HANDLERS
+        for event_pairing in event_pairings:
+            event_handler = event_handlers.get(event_pairing[0].message_type)
+            if event_handler is not None:
+                event_handler(self, tokens, event_pairing)
 
         if apply_buffer:
-            self.cur_rest_buffer = max(self.cur_time_target - self.cur_time, self.cur_rest_buffer)
-            tokens.extend(
-                self._general_tokenise_flush_time_buffer(time=self.cur_rest_buffer, index_time_def=4))
-            self.cur_time += self.cur_rest_buffer
-            self.cur_rest_buffer = 0
+            self._tokenise_flush_rest_buffer(tokens, max(self.cur_time_target - self.cur_time, self.cur_rest_buffer))
+
+        if insert_border_tokens:
+            tokens.append(self.TOKEN_STOP)
 
         if reset_time:
             self.reset_time()
 
         return tokens
 
+    def _tokenise_note_event(self, tokens: array, event_pairing: list[Message]) -> None:
+        msg_start, msg_stop = event_pairing
+        msg_time = msg_start.time
+        msg_note = msg_start.note
+        msg_value = msg_stop.time - msg_time
+
+        if not (21 <= msg_note <= 108):
+            raise TokenisationException(f"Invalid note pitch: {msg_note}")
+        if msg_value not in BaseLargeVocabularyNotelikeTokeniser._SUPPORTED_VALUES_SET:
+            raise TokenisationException(f"Invalid note value: {msg_value}")
+
+        # Check if message occurs at current time, if not place rest messages
+        if not self.cur_time == msg_time:
+            self._tokenise_flush_rest_buffer(tokens, self.cur_rest_buffer + msg_time - self.cur_time)
+
+        # Callback
+        self._tokenise_note(tokens, msg_note, msg_value)
+
+        # Time target only ever grows, extend it if the note ends after it
+        note_end_time = self.cur_time + msg_value
+        if note_end_time > self.cur_time_target:
+            self.cur_time_target = note_end_time
+        self.prv_note = msg_note
+
+    def _tokenise_time_signature_event(self, tokens: array, event_pairing: list[Message]) -> None:
+        msg = event_pairing[0]
+        msg_time = msg.time
+        msg_numerator = msg.numerator
+        msg_denominator = msg.denominator
+
+        numerator = self._time_signature_to_eights(msg_numerator, msg_denominator)
+
+        # Check if time signature has to be defined
+        if not (self.prv_numerator == numerator and self._running_time_sig):
+            self._tokenise_flush_rest_buffer(tokens, self.cur_rest_buffer + msg_time - self.cur_time)
+
+            tokens.append(numerator + self._TS_TOKEN_BASE)
+
+        self.prv_numerator = numerator
+
+    def _tokenise_internal_event(self, tokens: array, event_pairing: list[Message]) -> None:
+        self.cur_rest_buffer += event_pairing[0].time - self.cur_time
+
+    # Handlers for the types of events occurring in sequences, stored as plain functions such that they operate on the
+    # instance they are called for
+    _EVENT_HANDLERS = {MessageType.NOTE_ON: _tokenise_note_event,
+                       MessageType.TIME_SIGNATURE: _tokenise_time_signature_event,
+                       MessageType.INTERNAL: _tokenise_internal_event}
+
+    def _tokenise_flush_rest_buffer(self, tokens: array, rest_buffer: int) -> None:
+        # Place wait tokens for the given rest and advance the current time past it
+        self._general_tokenise_flush_time_buffer(tokens, time=rest_buffer, index_time_def=4)
+        self.cur_time += rest_buffer
+        self.cur_rest_buffer = 0
+
     @abstractmethod
-    def _tokenise_note(self, tokens: list[int], msg_note: int, msg_value: int) -> None:
+    def _tokenise_note(self, tokens: array, msg_note: int, msg_value: int) -> None:
         pass
 
 
@@ -550,180 +739,270 @@ class LargeVocabularyNotelikeTokeniser(BaseLargeVocabularyNotelikeTokeniser):
         super().__init__(running_time_sig)
 
     NOTE_SECTION_SIZE = 88
-
-    def _tokenise_note(self, tokens: list[int], msg_note: int, msg_value: int) -> None:
+    # Offset from the pitch of a note to its token, for each supported value of the note
+    _VALUE_TOKEN_OFFSETS = dict(zip(
+        BaseLargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES,
+        range(28 - 21, 28 - 21 + len(BaseLargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES) * NOTE_SECTION_SIZE,
+              NOTE_SECTION_SIZE)))
+    # First time signature token, directly following the note tokens
+    _BOUNDARY_TOKEN_TS = len(BaseLargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES) * NOTE_SECTION_SIZE + 4 + 24
+    _TS_TOKEN_BASE = _BOUNDARY_TOKEN_TS - 2
+    # Kinds of tokens, `_TOKEN_KIND_INVALID` for tokens outside the vocabulary
+    _TOKEN_KIND_PAD = 0
+    _TOKEN_KIND_START = 1
+    _TOKEN_KIND_STOP = 2
+    _TOKEN_KIND_SEPARATOR = 3
+    _TOKEN_KIND_WAIT = 4
+    _TOKEN_KIND_NOTE = 5
+    _TOKEN_KIND_TIME_SIGNATURE = 6
+    _TOKEN_KIND_INVALID = 7
+    # Range of the tokens of each kind, in order of the kinds
+    _TOKEN_KIND_RANGES = (range(0, 1), range(1, 2), range(2, 3), range(3, 4), range(4, 28),
+                          range(28, _BOUNDARY_TOKEN_TS), range(_BOUNDARY_TOKEN_TS, _BOUNDARY_TOKEN_TS + 15))
+    # Last token of each kind, classifies arrays of tokens by their kind using `np.searchsorted`
+    _TOKEN_KIND_BOUNDS = np.array([token_range[-1] for token_range in _TOKEN_KIND_RANGES])
+    # Kind of each token of the vocabulary
+    _TOKEN_KINDS = {token: token_kind for token_kind, token_range in enumerate(_TOKEN_KIND_RANGES)
+                    for token in token_range}
+
+    # Pitch and value of the note represented by each token, zero for tokens not representing notes
+    _TOKEN_NOTE_PITCHES = np.concatenate(
+        (np.zeros(28, dtype=np.int64),
+         np.tile(np.arange(21, 21 + NOTE_SECTION_SIZE), len(BaseLargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES)),
+         np.zeros(15, dtype=np.int64)))
+    _TOKEN_NOTE_VALUES = np.concatenate(
+        (np.zeros(28, dtype=np.int64),
+         np.repeat(BaseLargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES, NOTE_SECTION_SIZE),
+         np.zeros(15, dtype=np.int64)))
+    # Types of the messages resulting from detokenisation, indexed by 0 ... note start, 1 ... note stop, 2 ... time
+    # signature
+    _DETOKENISE_MESSAGE_TYPES = np.array([MessageType.NOTE_ON, MessageType.NOTE_OFF, MessageType.TIME_SIGNATURE],
+                                         dtype=object)
+    # Keys and default values of the state passed between calls of `get_mask`
+    _MASK_STATE_KEYS = ("prv_step", "prv_time", "prv_bar_capacity_overall", "prv_bar_capacity_remaining",
+                        "prv_numerator", "prv_flag_seq_started", "prv_flag_seq_stopped", "prv_flag_at_bar_start",
+                        "prv_flag_at_bar_end")
+    _MASK_STATE_DEFAULTS = (0, 0, 0, 0, 8, False, False, False, False)
+    # Keys of the memory of open notes, which follows the other entries of the state
+    _MASK_STATE_NOTE_KEYS = ("prv_mem_note_end_times", "prv_mem_note_pitches")
+
+    def _tokenise_note(self, tokens: array, msg_note: int, msg_value: int) -> None:
         # Add token representing pitch and value
-        tokens.append(
-            msg_note - 21 + 28 + LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES.index(msg_value) * 88)
+        tokens.append(msg_note + LargeVocabularyNotelikeTokeniser._VALUE_TOKEN_OFFSETS[msg_value])
 
     @staticmethod
     def detokenise(tokens: list[int]) -> Sequence:
-        seq = Sequence()
-        cur_time = 0
+        boundary_token_ts = LargeVocabularyNotelikeTokeniser._BOUNDARY_TOKEN_TS
 
-        note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
-        boundary_token_ts = len(LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES) * note_section_size + 4 + 24
+        event_kinds, event_tokens, event_times, note_pitches, note_values = \
+            LargeVocabularyNotelikeTokeniser._detokenise_events(np.asarray(tokens, dtype=np.int64))
 
-        for token in tokens:
-            if token <= 3:
-                pass
-            elif 4 <= token <= 27:
-                cur_time += token - 3
-            elif 28 <= token <= boundary_token_ts - 1:
-                note_pitch = (token - 28) % note_section_size + 21
-                note_value = LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES[(token - 28) // note_section_size]
-
-                seq.add_absolute_message(
-                    Message(message_type=MessageType.NOTE_ON, note=note_pitch, time=cur_time))
-                seq.add_absolute_message(
-                    Message(message_type=MessageType.NOTE_OFF, note=note_pitch, time=cur_time + note_value))
-            elif boundary_token_ts <= token <= boundary_token_ts + 14:
-                seq.add_absolute_message(
-                    Message(message_type=MessageType.TIME_SIGNATURE, time=cur_time,
-                            numerator=token - boundary_token_ts + 2,
-                            denominator=8)
-                )
-            else:
-                raise TokenisationException(f"Encountered invalid token during detokenisation: {token}")
+        # Notes result in a start and a stop message, time signatures in a single message
+        is_note = event_kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_NOTE
+        indices = np.repeat(np.arange(len(event_kinds)), np.where(is_note, 2, 1))
+        is_stop = np.zeros(len(indices), dtype=bool)
+        is_stop[1:] = indices[1:] == indices[:-1]
+        is_note = is_note[indices]
 
-        return seq
+        message_types = LargeVocabularyNotelikeTokeniser._DETOKENISE_MESSAGE_TYPES[
+            np.where(is_note, is_stop.astype(np.int64), 2)]
+        times = event_times[indices] + np.where(is_stop, note_values[indices], 0)
+        notes = np.where(is_note, note_pitches[indices], None)
+        numerators = np.where(is_note, None, event_tokens[indices] - boundary_token_ts + 2)
+        denominators = np.where(is_note, None, 8)
+
+        return Sequence.from_arrays(message_types.tolist(), times.tolist(), notes.tolist(), numerators.tolist(),
+                                    denominators.tolist())
 
     @staticmethod
-    def get_info(tokens: list[int]) -> dict():
-        info_pos = []
-        info_time = []
-        info_time_bar = []
-        info_pitch = []
-        info_cof = []
+    def detokenise_packed(tokens: np.ndarray) -> Sequence:
+        """Detokenises tokens stored in a compact array, see `tokenise_packed`.
 
-        cur_pos = 0
-        cur_time = 0
-        cur_time_bar = 0
-        note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
-        boundary_token_ts = len(LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES) * note_section_size + 4 + 24
+        Args:
+            tokens: Array of tokens
 
-        for token in tokens:
-            info_time.append(cur_time)
-            info_time_bar.append(cur_time_bar)
-
-            if token <= 2:
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-            elif token == 3:
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-                cur_time_bar = 0
-            elif 4 <= token <= 27:
-                cur_time += token - 3
-                cur_time_bar += token - 3
+        Returns: The resulting sequence.
 
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-            elif 28 <= token <= boundary_token_ts - 1:
-                note_pitch = (token - 28) % note_section_size + 21
-                # note_value = LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES[(token - 28) // note_section_size]
+        """
+        return LargeVocabularyNotelikeTokeniser.detokenise(tokens)
 
-                assert 21 <= note_pitch <= 108, f"Invalid note pitch: {note_pitch}"
+    @staticmethod
+    def _detokenise_events(tokens: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Decodes the given tokens into arrays describing all tokens that result in messages.
 
-                info_pitch.append(note_pitch - 21)
-                info_cof.append(CircleOfFifths.get_position(note_pitch))
-            elif boundary_token_ts <= token <= boundary_token_ts + 14:
-                info_pitch.append(math.nan)
-                info_cof.append(math.nan)
-            else:
-                raise TokenisationException(f"Encountered invalid token during detokenisation: {token}")
+        Args:
+            tokens: Array of tokens to decode
 
-            info_pos.append(cur_pos)
+        Returns: The kind, token, point in time, note pitch and note value of each token that represents a note or
+        a time signature, in order of occurrence. Pitch and value are zero for tokens not representing notes.
 
-            cur_pos += 1
+        """
+        # Classify tokens by range
+        kinds = np.searchsorted(LargeVocabularyNotelikeTokeniser._TOKEN_KIND_BOUNDS, tokens)
 
-        return {"info_position": info_pos,
-                "info_time": info_time,
-                "info_time_bar": info_time_bar,
-                "info_pitch": info_pitch,
-                "info_circle_of_fifths": info_cof}
+        # Validate all tokens at once before decoding them
+        invalid = kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_INVALID
+        if np.any(invalid):
+            position = int(np.argmax(invalid))
+            raise TokenisationException(
+                f"Encountered invalid token during detokenisation: {tokens[position]} at position {position}")
+
+        # Point in time of each token is the sum of all waits up to it
+        times = np.cumsum(np.where(kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_WAIT, tokens - 3, 0))
+
+        indices = np.flatnonzero((kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_NOTE) |
+                                 (kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_TIME_SIGNATURE))
+        event_tokens = tokens[indices]
+        note_pitches = LargeVocabularyNotelikeTokeniser._TOKEN_NOTE_PITCHES.take(event_tokens, mode="clip")
+        note_values = LargeVocabularyNotelikeTokeniser._TOKEN_NOTE_VALUES.take(event_tokens, mode="clip")
+
+        return kinds[indices], event_tokens, times[indices], note_pitches, note_values
+
+    @staticmethod
+    def get_info(tokens: list[int]) -> dict():
+        note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
+
+        tokens = np.asarray(tokens, dtype=np.int64)
+
+        # Classify tokens by range in a single pass
+        kinds = np.searchsorted(LargeVocabularyNotelikeTokeniser._TOKEN_KIND_BOUNDS, tokens)
+
+        invalid = kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_INVALID
+        if np.any(invalid):
+            raise TokenisationException(
+                f"Encountered invalid token during detokenisation: {tokens[np.argmax(invalid)]}")
+
+        is_separator = kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_SEPARATOR
+        is_wait = kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_WAIT
+        is_note = kinds == LargeVocabularyNotelikeTokeniser._TOKEN_KIND_NOTE
+
+        # Information is recorded before processing the respective token
+        waits = np.where(is_wait, tokens - 3, 0)
+        info_time = np.cumsum(waits) - waits
+        # Time of the most recent preceding separator, as time only increases this is the maximum of these times
+        times_bar_start = np.concatenate(([0], np.maximum.accumulate(np.where(is_separator, info_time, 0))))[:-1]
+        info_time_bar = info_time - times_bar_start
+
+        note_pitches = (tokens[is_note] - 28) % note_section_size + 21
+        info_pitch = np.full(len(tokens), math.nan, dtype=object)
+        info_pitch[is_note] = (note_pitches - 21).tolist()
+        info_cof = np.full(len(tokens), math.nan, dtype=object)
+        info_cof[is_note] = CircleOfFifths.pitch_positions[note_pitches].tolist()
+
+        return {"info_position": list(range(len(tokens))),
+                "info_time": info_time.tolist(),
+                "info_time_bar": info_time_bar.tolist(),
+                "info_pitch": info_pitch.tolist(),
+                "info_circle_of_fifths": info_cof.tolist()}
 
     @staticmethod
     def get_mask(tokens: list[int], max_len: int = -1, previous_state: dict = None) -> tuple[
-        list[np.ndarray], dict[str, Any]]:
-        cur_step = 0
-        cur_time = 0
-        cur_bar_capacity_overall = 0
-        cur_bar_capacity_remaining = 0
-        cur_numerator = 8
+        np.ndarray, dict[str, Any]]:
+        if previous_state is None:
+            previous_state = dict()
 
-        flag_seq_started = False
-        flag_seq_stopped = False
-        flag_at_bar_start = False
-        flag_at_bar_end = False
-        mem_cur_step_notes = dict()
+        # Memory of open notes is modified in place, copy it
+        mem_note_end_times, mem_note_pitches = (list(previous_state.get(key, [])) for key in
+                                                LargeVocabularyNotelikeTokeniser._MASK_STATE_NOTE_KEYS)
 
-        note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
-        boundary_token_ts = len(LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES) * note_section_size + 4 + 24
+        # Convert states of previous versions, which stored the pitches of open notes by their end time
+        if "prv_mem_cur_step_notes" in previous_state:
+            if any(key in previous_state for key in LargeVocabularyNotelikeTokeniser._MASK_STATE_NOTE_KEYS):
+                raise TokenisationException("Previous state contains open notes in both the legacy and current format")
 
-        if previous_state is not None:
-            cur_step = previous_state.get("prv_step", cur_step)
-            cur_time = previous_state.get("prv_time", cur_time)
-            cur_bar_capacity_overall = previous_state.get("prv_bar_capacity_overall", cur_bar_capacity_overall)
-            cur_bar_capacity_remaining = previous_state.get("prv_bar_capacity_remaining", cur_bar_capacity_remaining)
-            cur_numerator = previous_state.get("prv_numerator", cur_numerator)
+            for note_end_time, note_pitches in previous_state["prv_mem_cur_step_notes"].items():
+                for note_pitch in note_pitches:
+                    mem_note_end_times.append(note_end_time)
+                    mem_note_pitches.append(note_pitch)
 
-            flag_seq_started = previous_state.get("prv_flag_seq_started", flag_seq_started)
-            flag_seq_stopped = previous_state.get("prv_flag_seq_stopped", flag_seq_stopped)
-            flag_at_bar_start = previous_state.get("prv_flag_at_bar_start", flag_at_bar_start)
-            flag_at_bar_end = previous_state.get("prv_flag_at_bar_end", flag_at_bar_end)
-            mem_cur_step_notes = previous_state.get("prv_mem_cur_step_notes", mem_cur_step_notes)
+        state = tuple(previous_state.get(key, default) for key, default in
+                      zip(LargeVocabularyNotelikeTokeniser._MASK_STATE_KEYS,
+                          LargeVocabularyNotelikeTokeniser._MASK_STATE_DEFAULTS)) + \
+            (mem_note_end_times, mem_note_pitches)
 
-        masks = []
+        masks, state = LargeVocabularyNotelikeTokeniser._get_mask_kernel(tokens, max_len, state)
 
-        for i_token, token in enumerate(tokens[cur_step:]):
-            if max_len != -1 and i_token >= max_len:
-                break
+        return masks, dict(zip(LargeVocabularyNotelikeTokeniser._MASK_STATE_KEYS +
+                               LargeVocabularyNotelikeTokeniser._MASK_STATE_NOTE_KEYS, state))
 
-            # Reconnaissance
-            if token == 0:
-                pass
-            elif token == 1:
-                flag_seq_started = True
-                flag_at_bar_start = True
+    @staticmethod
+    def _get_mask_kernel(tokens: list[int], max_len: int, state: tuple) -> tuple[np.ndarray, tuple]:
+        """Calculates the masks for the given tokens, see `get_mask`.
 
-                cur_bar_capacity_remaining = 12 * cur_numerator
-                cur_bar_capacity_overall = cur_bar_capacity_remaining
-            elif token == 2:
-                flag_seq_stopped = True
-            elif token == 3:
-                flag_at_bar_start = True
-                flag_at_bar_end = False
+        Args:
+            tokens: The tokens to calculate the masks for
+            max_len: The maximum amount of masks to calculate, -1 for no limit
+            state: The state to start from, with entries in the order of `_MASK_STATE_KEYS` followed by
+                `_MASK_STATE_NOTE_KEYS`
 
-                cur_bar_capacity_remaining = cur_numerator * 12
-                cur_bar_capacity_overall = cur_bar_capacity_remaining
-            elif 4 <= token <= 27:
+        Returns: The calculated masks as a single array with one row per processed token, and the state after the
+        last processed token.
+
+        """
+        cur_step, cur_time, cur_bar_capacity_overall, cur_bar_capacity_remaining, cur_numerator, \
+            flag_seq_started, flag_seq_stopped, flag_at_bar_start, flag_at_bar_end, \
+            mem_note_end_times, mem_note_pitches = state
+
+        note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
+        boundary_token_ts = LargeVocabularyNotelikeTokeniser._BOUNDARY_TOKEN_TS
+        get_token_kind = LargeVocabularyNotelikeTokeniser._TOKEN_KINDS.get
+        kind_pad, kind_start, kind_stop, kind_separator, kind_wait, kind_note, kind_time_signature = \
+            (LargeVocabularyNotelikeTokeniser._TOKEN_KIND_PAD, LargeVocabularyNotelikeTokeniser._TOKEN_KIND_START,
+             LargeVocabularyNotelikeTokeniser._TOKEN_KIND_STOP, LargeVocabularyNotelikeTokeniser._TOKEN_KIND_SEPARATOR,
+             LargeVocabularyNotelikeTokeniser._TOKEN_KIND_WAIT, LargeVocabularyNotelikeTokeniser._TOKEN_KIND_NOTE,
+             LargeVocabularyNotelikeTokeniser._TOKEN_KIND_TIME_SIGNATURE)
+        supported_values = LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES
+
+        # Allocate all masks at once, one means allowed
+        num_masks = max(len(tokens) - cur_step, 0)
+        if max_len != -1:
+            num_masks = min(num_masks, max_len)
+        masks = np.ones((num_masks, LargeVocabularyNotelikeTokeniser.VOCAB_SIZE), dtype=bool)
+
+        # Index the tokens directly instead of iterating over a copy of the remaining ones, the step is advanced at
+        # the end of every iteration
+        for i_token in range(num_masks):
+            token = tokens[cur_step]
+
+            # Reconnaissance, dispatching on the kind of the token with the most frequent kinds first
+            token_kind = get_token_kind(token)
+            if token_kind == kind_note:
+                note_pitch = (token - 28) % note_section_size + 21
+                note_value = supported_values[(token - 28) // note_section_size]
+
+                flag_at_bar_start = False
+                mem_note_end_times.append(cur_time + note_value)
+                mem_note_pitches.append(note_pitch)
+
+                if note_value > cur_bar_capacity_remaining:
+                    raise TokenisationException("Note value exceeds bar capacity while calculating restraints.")
+            elif token_kind == kind_wait:
                 cur_time += token - 3
                 cur_bar_capacity_remaining -= token - 3
                 flag_at_bar_start = False
 
-                new_mem_cur_step_notes = dict()
-                for note_end_time, note_pitches in mem_cur_step_notes.items():
+                # Forget notes that have ended, compacting the memory in place in a single pass
+                i_kept = 0
+                for note_end_time, note_pitch in zip(mem_note_end_times, mem_note_pitches):
                     if note_end_time > cur_time:
-                        new_mem_cur_step_notes[note_end_time] = note_pitches
-                mem_cur_step_notes = new_mem_cur_step_notes
+                        mem_note_end_times[i_kept] = note_end_time
+                        mem_note_pitches[i_kept] = note_pitch
+                        i_kept += 1
+                del mem_note_end_times[i_kept:]
+                del mem_note_pitches[i_kept:]
 
                 if cur_bar_capacity_remaining < 0:
                     raise TokenisationException("Bar capacity underflow while calculating restraints.")
 
                 if cur_bar_capacity_remaining == 0:
                     flag_at_bar_end = True
-            elif 28 <= token <= boundary_token_ts - 1:
-                note_pitch = (token - 28) % note_section_size + 21
-                note_value = LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES[(token - 28) // note_section_size]
-
-                flag_at_bar_start = False
-                mem_cur_step_notes.setdefault(cur_time + note_value, set()).add(note_pitch)
-
-                if note_value > cur_bar_capacity_remaining:
-                    raise TokenisationException("Note value exceeds bar capacity while calculating restraints.")
+            elif token_kind == kind_separator:
+                flag_at_bar_start = True
+                flag_at_bar_end = False
 
-            elif boundary_token_ts <= token <= boundary_token_ts + 14:
+                cur_bar_capacity_remaining = cur_numerator * 12
+                cur_bar_capacity_overall = cur_bar_capacity_remaining
+            elif token_kind == kind_time_signature:
                 if not flag_at_bar_start:
                     raise TokenisationException("Time signature not at bar start while calculating restraints.")
                 flag_at_bar_start = False
@@ -731,15 +1010,25 @@ class LargeVocabularyNotelikeTokeniser(BaseLargeVocabularyNotelikeTokeniser):
                 cur_numerator = token - boundary_token_ts + 2
                 cur_bar_capacity_remaining = cur_numerator * 12
                 cur_bar_capacity_overall = cur_bar_capacity_remaining
+            elif token_kind == kind_start:
+                flag_seq_started = True
+                flag_at_bar_start = True
+
+                cur_bar_capacity_remaining = 12 * cur_numerator
+                cur_bar_capacity_overall = cur_bar_capacity_remaining
+            elif token_kind == kind_stop:
+                flag_seq_stopped = True
+            elif token_kind == kind_pad:
+                pass
             else:
                 raise TokenisationException(f"Encountered invalid token during restraints calculation: {token}")
 
-            # Masking, one means allowed
-            mask = np.ones(LargeVocabularyNotelikeTokeniser.VOCAB_SIZE, dtype=bool)
+            # Masking
+            mask = masks[i_token]
 
             if not flag_seq_started:
                 # If sequence not started only start token allowed
-                mask = np.zeros(LargeVocabularyNotelikeTokeniser.VOCAB_SIZE, dtype=bool)
+                mask[:] = 0
                 mask[2] = 1
             else:
                 # Sequences has started, padding and start token disallowed
@@ -748,7 +1037,7 @@ class LargeVocabularyNotelikeTokeniser(BaseLargeVocabularyNotelikeTokeniser):
 
                 if flag_seq_stopped:
                     # If sequence stopped only padding token allowed
-                    mask = np.zeros(LargeVocabularyNotelikeTokeniser.VOCAB_SIZE, dtype=bool)
+                    mask[:] = 0
                     mask[0] = 1
                 else:
                     if not flag_at_bar_start:
@@ -764,28 +1053,19 @@ class LargeVocabularyNotelikeTokeniser(BaseLargeVocabularyNotelikeTokeniser):
                         # Mask wait tokens
                         mask[4 + cur_bar_capacity_remaining:27 + 1] = 0
 
-                    for i, supported_value in enumerate(LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES):
-                        # Mask notes with duration exceeding bar capacity
-                        if supported_value > cur_bar_capacity_remaining:
-                            mask[28 + note_section_size * i:28 + note_section_size * (i + 1)] = 0
+                    # Mask notes with duration exceeding bar capacity, supported values are sorted such that these
+                    # form a contiguous range of tokens
+                    i_exceeding = bisect_right(supported_values, cur_bar_capacity_remaining)
+                    mask[28 + note_section_size * i_exceeding:boundary_token_ts] = 0
 
-                    for note_end_time, note_pitches in mem_cur_step_notes.items():
-                        for note_pitch in note_pitches:
-                            for i, supported_value in enumerate(LargeVocabularyNotelikeTokeniser.SUPPORTED_VALUES):
-                                # Mask notes that are still active
-                                helper = 28 + note_pitch - 21 + note_section_size * i
-                                mask[28 + note_pitch - 21 + note_section_size * i] = 0
+                    # Mask notes that are still active, for all supported values at once by writing through a
+                    # (value, pitch) view of the note tokens
+                    if mem_note_pitches:
+                        mask[28:boundary_token_ts].reshape(-1, note_section_size)[
+                            :, np.array(mem_note_pitches, dtype=np.int64) - 21] = 0
 
             cur_step += 1
-            masks.append(mask)
-
-        return masks, {"prv_step": cur_step,
-                       "prv_time": cur_time,
-                       "prv_bar_capacity_overall": cur_bar_capacity_overall,
-                       "prv_bar_capacity_remaining": cur_bar_capacity_remaining,
-                       "prv_numerator": cur_numerator,
-                       "prv_flag_seq_started": flag_seq_started,
-                       "prv_flag_seq_stopped": flag_seq_stopped,
-                       "prv_flag_at_bar_start": flag_at_bar_start,
-                       "prv_flag_at_bar_end": flag_at_bar_end,
-                       "prv_mem_cur_step_notes": mem_cur_step_notes}
+
+        return masks, (cur_step, cur_time, cur_bar_capacity_overall, cur_bar_capacity_remaining, cur_numerator,
+                       flag_seq_started, flag_seq_stopped, flag_at_bar_start, flag_at_bar_end, mem_note_end_times,
+                       mem_note_pitches)
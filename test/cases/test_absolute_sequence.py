@@ -2,6 +2,21 @@ from base import *
 from scoda.enumerations.message_type import MessageType
 
 
+def test_add_messages():
+    sequence = util_midi_to_sequences()[0]
+    messages = [copy.copy(msg) for msg in reversed(sequence.abs.messages)]
+
+    sequence_single = Sequence()
+    for msg in messages:
+        sequence_single.add_absolute_message(msg)
+    sequence_batched = Sequence()
+    sequence_batched.add_absolute_messages(messages)
+
+    assert [msg.time for msg in sequence_batched.abs.messages] == [msg.time for msg in sequence_single.abs.messages]
+    assert all(msg_batched is msg_single for msg_batched, msg_single in
+               zip(sequence_batched.abs.messages, sequence_single.abs.messages))
+
+
 def test_cutoff():
     sequence = Sequence.sequences_load(file_path=RESOURCE_CHOPIN, track_indices=[[0]], meta_track_indices=[0])[0]
     sequence.cutoff(48, 24)
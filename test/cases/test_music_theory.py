@@ -1,6 +1,22 @@
 from base import *
 
 
+def test_circle_of_fifths_get_position():
+    assert CircleOfFifths.get_position(Note.C.value) == 0
+    assert CircleOfFifths.get_position(Note.G.value) == 1
+    assert CircleOfFifths.get_position(Note.F.value) == -1
+    assert CircleOfFifths.get_position(Note.F_S.value) == 6
+    assert CircleOfFifths.get_position(Note.C_S.value) == -5
+
+    assert CircleOfFifths.get_position(60) == 0
+    assert CircleOfFifths.get_position(67) == 1
+
+
+def test_circle_of_fifths_pitch_positions():
+    assert len(CircleOfFifths.pitch_positions) == 128
+    assert CircleOfFifths.pitch_positions.tolist() == [CircleOfFifths.get_position(pitch) for pitch in range(128)]
+
+
 def test_circle_of_fifths_get_distance():
     assert CircleOfFifths.get_distance(Note.C.value, Note.G.value) == 1
     assert CircleOfFifths.get_distance(Note.C.value, Note.F.value) == -1
@@ -31,3 +31,17 @@ def test_plot_pianorolls():
     plot_object = Sequence.plot_pianorolls([bars[0][0].sequence, bars[1][0].sequence])
 
     assert plot_object is not None
+
+
+def test_from_arrays():
+    sequence = Sequence.from_arrays([MessageType.TIME_SIGNATURE, MessageType.NOTE_ON, MessageType.NOTE_OFF],
+                                    [0, 0, 12], notes=[None, 60, 60], numerators=[3, None, None],
+                                    denominators=[4, None, None])
+
+    sequence_expected = Sequence()
+    sequence_expected.add_absolute_message(
+        Message(message_type=MessageType.TIME_SIGNATURE, time=0, numerator=3, denominator=4))
+    sequence_expected.add_absolute_message(Message(message_type=MessageType.NOTE_ON, note=60, time=0))
+    sequence_expected.add_absolute_message(Message(message_type=MessageType.NOTE_OFF, note=60, time=12))
+
+    assert [vars(msg) for msg in sequence.abs.messages] == [vars(msg) for msg in sequence_expected.abs.messages]
@@ -1,4 +1,7 @@
+import copy
+
 from base import *
+from scoda.exceptions.tokenisation_exception import TokenisationException
 from scoda.tokenisation.notelike_tokeniser import MultiTrackLargeVocabularyNotelikeTokeniser, \
     LargeVocabularyNotelikeTokeniser
 
@@ -78,6 +81,187 @@ def test_roundtrip_large_vocabulary_notelike_tokenisation(path_resource, running
 
     _test_roundtrip_tokenisation(tokeniser, path_resource, quantise=True)
 
+def test_large_vocabulary_notelike_tokenisation_border_tokens():
+    tokeniser = LargeVocabularyNotelikeTokeniser(running_time_sig=True)
+    sequence = Sequence.sequences_load(file_path=RESOURCE_SWEEP)[0]
+    sequence.quantise_and_normalise()
+    bar = Sequence.sequences_split_bars([sequence], 0)[0][0]
+
+    tokens = tokeniser.tokenise(bar.sequence)
+    tokeniser.reset()
+    tokens_border = tokeniser.tokenise(bar.sequence, insert_border_tokens=True)
+
+    assert tokens_border == [LargeVocabularyNotelikeTokeniser.TOKEN_START] + tokens + [
+        LargeVocabularyNotelikeTokeniser.TOKEN_STOP]
+    assert tokeniser.detokenise(tokens_border) == tokeniser.detokenise(tokens)
+
+
+def test_large_vocabulary_notelike_tokenisation_copy():
+    tokeniser = LargeVocabularyNotelikeTokeniser(running_time_sig=True)
+    sequences = Sequence.sequences_load(file_path=RESOURCE_MOZART)
+    sequence = sequences[0]
+    sequence.merge(sequences[1:])
+    sequence.quantise_and_normalise()
+    bars = Sequence.sequences_split_bars([sequence], 0)[0]
+
+    tokeniser.tokenise(bars[0].sequence, reset_time=False)
+
+    # A shallow copy has to tokenise based on its own state, not the one of the original tokeniser
+    assert copy.copy(tokeniser).tokenise(bars[1].sequence) == copy.deepcopy(tokeniser).tokenise(bars[1].sequence)
+
+
+def test_large_vocabulary_notelike_tokenisation_packed():
+    tokeniser = LargeVocabularyNotelikeTokeniser(running_time_sig=False)
+    sequence = Sequence.sequences_load(file_path=RESOURCE_SWEEP)[0]
+    sequence.quantise_and_normalise()
+    bar = Sequence.sequences_split_bars([sequence], 0)[0][0]
+
+    tokens = tokeniser.tokenise(bar.sequence)
+    tokens_packed = tokeniser.tokenise_packed(bar.sequence)
+
+    assert tokens_packed.dtype == np.uint16
+    assert tokens_packed.tolist() == tokens
+    assert tokeniser.detokenise_packed(tokens_packed) == tokeniser.detokenise(tokens)
+
+
+def test_multi_track_large_vocabulary_notelike_get_info():
+    tokeniser = MultiTrackLargeVocabularyNotelikeTokeniser()
+    tokens = ["sta", "rst_24", "bar", "ins_00-pit_060-val_04-vel_127", "tsg_03_08", "rst_02", "bar", "sto"]
+    capacity = tokeniser.ppqn * 4
+
+    info = tokeniser.get_info(tokens)
+
+    assert info["info_position"] == [0, 1, 2, 3, 4, 5, 6, 7]
+    assert info["info_time"] == [0, 0, 24, capacity, capacity, capacity, capacity + 2,
+                                 capacity + tokeniser.ppqn * 3 // 2]
+    assert info["info_time_bar"] == [0, 0, 24, 0, 0, 0, 2, 0]
+    assert info["info_pitch"][3] == 60
+    assert info["info_circle_of_fifths"][3] == CircleOfFifths.get_position(60)
+    assert all(math.isnan(info["info_pitch"][i]) for i in [0, 1, 2, 4, 5, 6, 7])
+    assert tokeniser.get_info_ids(np.array(tokeniser.encode(tokens))) == info
+
+    info_np = tokeniser.get_info_np(np.array(tokeniser.encode(tokens)))
+
+    assert info_np["info_time"].tolist() == info["info_time"]
+    assert np.isnan(info_np["info_pitch"]).tolist() == [True, True, True, False, True, True, True, True]
+    assert info_np["info_pitch"][3] == 60
+
+    with pytest.raises(TokenisationException):
+        tokeniser.get_info(["rst_24", "rst_05", "bar"])
+
+
+def test_multi_track_large_vocabulary_notelike_flush_buffer():
+    tokeniser = MultiTrackLargeVocabularyNotelikeTokeniser()
+
+    assert tokeniser._flush_buffer(24) == ["rst_24"]
+    assert tokeniser._flush_buffer(24.0) == ["rst_24"]
+    with pytest.raises(TokenisationException):
+        tokeniser._flush_buffer(25.5)
+
+
+def test_multi_track_large_vocabulary_notelike_detokenise_ids():
+    tokeniser = MultiTrackLargeVocabularyNotelikeTokeniser(num_instruments=2)
+    tokens = ["rst_24", "ins_01-pit_060-val_04-vel_127", "rst_02", "bar", "ins_00-pit_064-val_08-vel_127", "bar"]
+
+    sequences = tokeniser.detokenise(tokens)
+    sequences_ids = tokeniser.detokenise_ids(np.array(tokeniser.encode(tokens)))
+
+    assert tokeniser.decode(np.array(tokeniser.encode(tokens))) == tokens
+    with pytest.raises(TokenisationException):
+        tokeniser.decode(np.array([-1]))
+    with pytest.raises(TokenisationException):
+        tokeniser.decode([3, -1])
+    with pytest.raises(TokenisationException):
+        tokeniser.decode([tokeniser.dictionary_size])
+
+    assert len(sequences_ids) == 2
+    for sequence, sequence_ids in zip(sequences, sequences_ids):
+        assert [(msg.message_type, msg.time, msg.note) for msg in sequence.abs.messages] == \
+               [(msg.message_type, msg.time, msg.note) for msg in sequence_ids.abs.messages]
+
+    with pytest.raises(TokenisationException):
+        tokeniser.detokenise_ids(np.array([tokeniser.dictionary["sta"]]))
+    with pytest.raises(TokenisationException):
+        tokeniser.detokenise_ids(np.array([-1, 3]))
+    with pytest.raises(TokenisationException):
+        tokeniser.detokenise_ids(np.array([3, tokeniser.dictionary_size]))
+
+
+def test_large_vocabulary_notelike_get_info():
+    info = LargeVocabularyNotelikeTokeniser.get_info([1, 3, 5, 3, 30, 6, 2])
+
+    assert info["info_position"] == [0, 1, 2, 3, 4, 5, 6]
+    assert info["info_time"] == [0, 0, 0, 2, 2, 2, 5]
+    assert info["info_time_bar"] == [0, 0, 0, 2, 0, 0, 3]
+    assert info["info_pitch"][4] == 2
+    assert info["info_circle_of_fifths"][4] == CircleOfFifths.get_position(23)
+    assert all(math.isnan(info["info_pitch"][i]) for i in [0, 1, 2, 3, 5, 6])
+
+
+def test_large_vocabulary_notelike_get_mask():
+    tokens = [1, 3, 5, 3, 30, 6, 2]
+
+    masks, state = LargeVocabularyNotelikeTokeniser.get_mask(tokens, max_len=4)
+    masks_continued, _ = LargeVocabularyNotelikeTokeniser.get_mask(tokens, previous_state=state)
+
+    assert masks.shape == (4, LargeVocabularyNotelikeTokeniser.VOCAB_SIZE)
+    assert masks_continued.shape == (3, LargeVocabularyNotelikeTokeniser.VOCAB_SIZE)
+    assert np.array_equal(np.concatenate((masks, masks_continued)), LargeVocabularyNotelikeTokeniser.get_mask(tokens)[0])
+
+
+def test_large_vocabulary_notelike_get_mask_content():
+    note_section_size = LargeVocabularyNotelikeTokeniser.NOTE_SECTION_SIZE
+    boundary_token_ts = LargeVocabularyNotelikeTokeniser._BOUNDARY_TOKEN_TS
+    # Start, separator, note of pitch 21 and value 8, waits of 24, 24, 24, 14 and 10 ticks, separator, stop
+    tokens = [1, 3, 380, 27, 27, 27, 17, 13, 3, 2]
+
+    masks, _ = LargeVocabularyNotelikeTokeniser.get_mask(tokens)
+
+    # Open pitch is masked for every note value, other pitches are not
+    assert not masks[2, 28:boundary_token_ts:note_section_size].any()
+    assert masks[2, 29:boundary_token_ts:note_section_size].all()
+    # Pitch is available again after the note has ended, for all values fitting into the remaining 72 ticks
+    assert masks[3, 28:28 + note_section_size * 15:note_section_size].all()
+
+    # Time signatures only at bar start
+    assert masks[1, boundary_token_ts:boundary_token_ts + 15].all()
+    assert not masks[2, boundary_token_ts:boundary_token_ts + 15].any()
+
+    # Stop and separator tokens only at bar end
+    assert not masks[2, 2] and not masks[2, 3]
+    assert masks[7, 2] and masks[7, 3]
+
+    # Remaining bar capacity of 10 ticks, allowing waits of up to 10 ticks and note values of up to 9 ticks
+    assert masks[6, 4:14].all()
+    assert not masks[6, 14:28].any()
+    assert masks[6, 28 + note_section_size * 5 + 39]
+    assert not masks[6, 28 + note_section_size * 6:boundary_token_ts].any()
+
+    # Bar is full, neither waits nor notes allowed
+    assert not masks[7, 4:boundary_token_ts].any()
+
+
+def test_large_vocabulary_notelike_get_mask_legacy_state():
+    tokens = [1, 3, 380, 4, 31, 2]
+
+    masks, state = LargeVocabularyNotelikeTokeniser.get_mask(tokens, max_len=4)
+    state_legacy = {key: value for key, value in state.items() if key not in ["prv_mem_note_end_times",
+                                                                                "prv_mem_note_pitches"]}
+    state_legacy["prv_mem_cur_step_notes"] = {8: {21}}
+
+    assert state["prv_mem_note_end_times"] == [8]
+    assert np.array_equal(LargeVocabularyNotelikeTokeniser.get_mask(tokens, previous_state=state_legacy)[0],
+                          LargeVocabularyNotelikeTokeniser.get_mask(tokens, previous_state=state)[0])
+
+    with pytest.raises(TokenisationException):
+        LargeVocabularyNotelikeTokeniser.get_mask(tokens, previous_state={**state, **state_legacy})
+
+
+def test_large_vocabulary_notelike_detokenisation_invalid_token():
+    with pytest.raises(TokenisationException, match="at position 2"):
+        LargeVocabularyNotelikeTokeniser.detokenise([1, 4, LargeVocabularyNotelikeTokeniser.VOCAB_SIZE, 3])
+
+
 def _test_roundtrip_tokenisation(tokeniser, path_resource, quantise=True, detokenise=True):
     sequences = Sequence.sequences_load(file_path=path_resource)
     sequence = sequences[0]